@@ -1,17 +1,133 @@
 """entrypoint - Containerized OSBuild Composer
 
 This provides the entrypoint for a containerized osbuild-composer image. It
-spawns `osbuild-composer` on start and manages it until it exits. The main
-purpose of this entrypoint is to prepare everything to be usable from within
-a container.
+prepares the API sockets and then replaces itself with `osbuild-composer`. If
+the builtin worker or dnf-json are enabled as well, it instead spawns all of
+them and manages them until `osbuild-composer` exits. The main purpose of this
+entrypoint is to prepare everything to be usable from within a container.
 """
 
-import argparse
 import contextlib
+import functools
 import os
-import socket
-import subprocess
 import sys
+import types
+
+
+# The command-line interface is a fixed set of `--[no-]<api>` toggles plus a
+# few integer options. It is small enough to be parsed by hand, which saves
+# importing and setting up `argparse` on every container start. The tables
+# below are built once at import and are read-only, since parse results are
+# cached and shared across `Cli` instances.
+
+_FLAGS = types.MappingProxyType({
+    "composer-api": ("composer_api", True),
+    "no-composer-api": ("composer_api", False),
+    "local-worker-api": ("local_worker_api", True),
+    "no-local-worker-api": ("local_worker_api", False),
+    "remote-worker-api": ("remote_worker_api", True),
+    "no-remote-worker-api": ("remote_worker_api", False),
+    "weldr-api": ("weldr_api", True),
+    "no-weldr-api": ("weldr_api", False),
+    "dnf-json": ("dnf_json", True),
+    "no-dnf-json": ("dnf_json", False),
+})
+
+_PORTS = types.MappingProxyType({
+    "composer-api-port": "composer_api_port",
+    "dnf-json-port": "dnf_json_port",
+})
+
+_DEFAULTS = types.MappingProxyType({
+    "builtin_worker": False,
+    "composer_api": False,
+    "composer_api_port": 443,
+    "local_worker_api": False,
+    "remote_worker_api": False,
+    "weldr_api": False,
+    "dnf_json": False,
+    "dnf_json_port": 0,
+})
+
+# Maximum number of sockets accepted from an FD-server.
+_MAX_FDS = 16
+
+_USAGE = """\
+usage: container/osbuild-composer [-h] [--[no-]composer-api]
+                                  [--composer-api-port PORT]
+                                  [--[no-]local-worker-api]
+                                  [--[no-]remote-worker-api]
+                                  [--[no-]weldr-api] [--[no-]dnf-json]
+                                  [--dnf-json-port PORT]
+"""
+
+_HELP = """\
+
+Containerized OSBuild Composer
+
+options:
+  -h, --help            show this help message and exit
+  --composer-api        Enable the composer-API
+  --no-composer-api     Disable the composer-API
+  --composer-api-port PORT
+                        Port which the composer-API listens on
+  --local-worker-api    Enable the local-worker-API
+  --no-local-worker-api
+                        Disable the local-worker-API
+  --remote-worker-api   Enable the remote-worker-API
+  --no-remote-worker-api
+                        Disable the remote-worker-API
+  --weldr-api           Enable the weldr-API
+  --no-weldr-api        Disable the weldr-API
+  --dnf-json            Enable dnf-json
+  --no-dnf-json         Disable dnf-json
+  --dnf-json-port PORT  Specify the port dnf-json should listen on
+"""
+
+
+def _error(message):
+    sys.stderr.write(_USAGE)
+    sys.stderr.write(f"container/osbuild-composer: error: {message}\n")
+    sys.exit(2)
+
+
+@functools.lru_cache(maxsize=4)
+def _parse_argv(argv):
+    # Parse the command-line arguments `argv` (excluding the program name)
+    # and return the resulting options as a tuple of `(dest, value)` pairs.
+    # The result is cached by `argv`, so it must not be mutable.
+
+    args = dict(_DEFAULTS)
+    argv = iter(argv)
+
+    for arg in argv:
+        if arg in ("-h", "--help"):
+            sys.stdout.write(_USAGE + _HELP)
+            sys.exit(0)
+
+        if not arg.startswith("--"):
+            _error(f"unrecognized arguments: {arg}")
+
+        name, sep, value = arg[2:].partition("=")
+
+        if name in _FLAGS:
+            if sep:
+                _error(f"argument --{name}: ignored explicit argument '{value}'")
+            dest, value = _FLAGS[name]
+            args[dest] = value
+        elif name in _PORTS:
+            if not sep:
+                value = next(argv, None)
+                if value is None:
+                    _error(f"argument --{name}: expected one argument")
+            try:
+                args[_PORTS[name]] = int(value)
+            except ValueError:
+                _error(f"argument --{name}: invalid int value: '{value}'")
+        else:
+            _error(f"unrecognized arguments: {arg}")
+
+    return tuple(args.items())
 
 
 class Cli(contextlib.AbstractContextManager):
@@ -21,207 +137,200 @@ class Cli(contextlib.AbstractContextManager):
         self.args = None
         self._argv = argv
         self._exitstack = None
-        self._parser = None
 
     def _parse_args(self):
-        self._parser = argparse.ArgumentParser(
-            add_help=True,
-            allow_abbrev=False,
-            argument_default=None,
-            description="Containerized OSBuild Composer",
-            prog="container/osbuild-composer",
-        )
-
-        # --[no-]composer-api
-        self._parser.add_argument(
-            "--composer-api",
-            action="store_true",
-            dest="composer_api",
-            help="Enable the composer-API",
-        )
-        self._parser.add_argument(
-            "--no-composer-api",
-            action="store_false",
-            dest="composer_api",
-            help="Disable the composer-API",
-        )
-        self._parser.add_argument(
-            "--composer-api-port",
-            type=int,
-            default=443,
-            dest="composer_api_port",
-            help="Port which the composer-API listens on",
-        )
-
-        # --[no-]local-worker-api
-        self._parser.add_argument(
-            "--local-worker-api",
-            action="store_true",
-            dest="local_worker_api",
-            help="Enable the local-worker-API",
-        )
-        self._parser.add_argument(
-            "--no-local-worker-api",
-            action="store_false",
-            dest="local_worker_api",
-            help="Disable the local-worker-API",
-        )
-
-        # --[no-]remote-worker-api
-        self._parser.add_argument(
-            "--remote-worker-api",
-            action="store_true",
-            dest="remote_worker_api",
-            help="Enable the remote-worker-API",
-        )
-        self._parser.add_argument(
-            "--no-remote-worker-api",
-            action="store_false",
-            dest="remote_worker_api",
-            help="Disable the remote-worker-API",
-        )
-
-        # --[no-]weldr-api
-        self._parser.add_argument(
-            "--weldr-api",
-            action="store_true",
-            dest="weldr_api",
-            help="Enable the weldr-API",
-        )
-        self._parser.add_argument(
-            "--no-weldr-api",
-            action="store_false",
-            dest="weldr_api",
-            help="Disable the weldr-API",
-        )
-
-        # --[no-]dnf-json
-        self._parser.add_argument(
-            "--dnf-json",
-            action="store_true",
-            dest="dnf_json",
-            help="Enable  dnf-json",
-        )
-        self._parser.add_argument(
-            "--no-dnf-json",
-            action="store_false",
-            dest="dnf_json",
-            help="Disable dnf-json",
-        )
-        self._parser.add_argument(
-            "--dnf-json-port",
-            type=int,
-            default=0,
-            dest="dnf_json_port",
-            help="Specify the port dnf-json should listen on",
-        )
-
-        self._parser.set_defaults(
-            builtin_worker=False,
-            composer_api=False,
-            local_worker_api=False,
-            remote_worker_api=False,
-            weldr_api=False,
-            dnf_json=False,
-        )
-
-        return self._parser.parse_args(self._argv[1:])
+        return types.SimpleNamespace(**dict(_parse_argv(tuple(self._argv[1:]))))
 
     def __enter__(self):
-        self._exitstack = contextlib.ExitStack()
         self.args = self._parse_args()
         return self
 
     def __exit__(self, exc_type, exc_value, exc_tb):
-        self._exitstack.close()
-        self._exitstack = None
+        if self._exitstack is not None:
+            self._exitstack.close()
+            self._exitstack = None
 
-    def _prepare_sockets(self):
-        # Prepare all the API sockets that osbuild-composer expectes, and make
-        # sure to pass them according to the systemd socket-activation API.
-        #
-        # Note that we rely on this being called early, so we get the correct
-        # FD numbers assigned. We need FD-#3 onwards for compatibility with
-        # socket activation (because python `subprocess.Popen` does not support
-        # renumbering the sockets we pass down).
+    @staticmethod
+    def _listen_unix(path, backlog=128):
+        import socket
+
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.bind(path)
+            sock.listen(backlog)
+        except:
+            sock.close()
+            raise
+        return sock
+
+    @staticmethod
+    def _listen_inet6(port, backlog=128):
+        import socket
+
+        # Listen on all addresses, both IPv6 and (mapped) IPv4. This is what
+        # `socket.create_server(..., dualstack_ipv6=True)` does as well, with
+        # the same system calls, but it requires python-3.8 and the UBI8 image
+        # still ships python-3.6.
+        sock = socket.socket(socket.AF_INET6, socket.SOCK_STREAM)
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            sock.setsockopt(socket.IPPROTO_IPV6, socket.IPV6_V6ONLY, 0)
+            sock.bind(("::", port))
+            sock.listen(backlog)
+        except:
+            sock.close()
+            raise
+        return sock
+
+    def _create_sockets(self):
+        # Create all the API sockets that osbuild-composer expectes.
 
-        index = 3
         sockets = []
         names = []
+        log = []
 
         # osbuild-composer.socket
         if self.args.weldr_api:
-            print("Create weldr-api socket", file=sys.stderr)
-            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
-            self._exitstack.enter_context(contextlib.closing(sock))
-            sock.bind("/run/weldr/api.socket")
-            sock.listen()
+            log.append("Create weldr-api socket")
+            sock = self._listen_unix("/run/weldr/api.socket")
+            self._exitstack.enter_context(sock)
             sockets.append(sock)
             names.append("osbuild-composer.socket")
 
-            assert(sock.fileno() == index)
-            index += 1
-
         # osbuild-composer-api.socket
         if self.args.composer_api:
-            print("Create composer-api socket on port {}".format(self.args.composer_api_port) , file=sys.stderr)
-            sock = socket.socket(socket.AF_INET6, socket.SOCK_STREAM)
-            self._exitstack.enter_context(contextlib.closing(sock))
-            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-            sock.setsockopt(socket.IPPROTO_IPV6, socket.IPV6_V6ONLY, 0)
-            sock.bind(("::", self.args.composer_api_port))
-            sock.listen()
+            log.append(f"Create composer-api socket on port {self.args.composer_api_port}")
+            sock = self._listen_inet6(self.args.composer_api_port)
+            self._exitstack.enter_context(sock)
             sockets.append(sock)
             names.append("osbuild-composer-api.socket")
 
-            assert(sock.fileno() == index)
-            index += 1
-
         # osbuild-local-worker.socket
         if self.args.local_worker_api:
-            print("Create local-worker-api socket", file=sys.stderr)
-            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
-            self._exitstack.enter_context(contextlib.closing(sock))
-            sock.bind("/run/osbuild-composer/job.socket")
-            sock.listen()
+            log.append("Create local-worker-api socket")
+            sock = self._listen_unix("/run/osbuild-composer/job.socket")
+            self._exitstack.enter_context(sock)
             sockets.append(sock)
             names.append("osbuild-local-worker.socket")
 
-            assert(sock.fileno() == index)
-            index += 1
-
         # osbuild-remote-worker.socket
         if self.args.remote_worker_api:
-            print("Create remote-worker-api socket", file=sys.stderr)
-            sock = socket.socket(socket.AF_INET6, socket.SOCK_STREAM)
-            self._exitstack.enter_context(contextlib.closing(sock))
-            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-            sock.setsockopt(socket.IPPROTO_IPV6, socket.IPV6_V6ONLY, 0)
-            sock.bind(("::", 8700))
-            sock.listen(256)
+            log.append("Create remote-worker-api socket")
+            sock = self._listen_inet6(8700, backlog=256)
+            self._exitstack.enter_context(sock)
             sockets.append(sock)
             names.append("osbuild-remote-worker.socket")
 
-            assert(sock.fileno() == index)
-            index += 1
+        # Report all sockets with a single write, rather than one per socket.
+        if log:
+            sys.stderr.write("\n".join(log) + "\n")
+
+        return tuple(sock.detach() for sock in sockets), names
+
+    def _receive_sockets(self, path):
+        # Receive the API sockets from an FD-server listening on `path`, rather
+        # than creating them. This allows a long-lived helper to keep them
+        # bound across restarts of the container. On connect, the server sends
+        # a single message with the `:`-separated socket names as payload (as
+        # expected in `LISTEN_FDNAMES=`) and the sockets attached as
+        # `SCM_RIGHTS`, in the same order.
+
+        import array
+        import socket
+
+        fds = array.array("i")
+
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+            conn.connect(path)
+            msg, ancdata, _, _ = conn.recvmsg(
+                4096,
+                socket.CMSG_SPACE(_MAX_FDS * fds.itemsize),
+            )
+
+        for level, kind, data in ancdata:
+            if level == socket.SOL_SOCKET and kind == socket.SCM_RIGHTS:
+                fds.frombytes(data[:len(data) - (len(data) % fds.itemsize)])
+
+        if not fds:
+            raise RuntimeError(f"FD-server at {path} sent no sockets")
+
+        names = msg.decode().split(":") if msg else []
+        if len(names) != len(fds):
+            for fd in fds:
+                os.close(fd)
+            raise RuntimeError(
+                f"FD-server sent {len(fds)} sockets for {len(names)} names"
+            )
+
+        return tuple(fds), names
+
+    def _renumber_fds(self, fds):
+        # Move the listener FDs `fds` onto FD-#3 onwards, as required by the
+        # socket-activation API, and return the new FD numbers. Python
+        # `subprocess.Popen` does not support renumbering the FDs it passes
+        # down, so we do it here. Ownership of `fds` is transferred.
+
+        import fcntl
+
+        count = len(fds)
+        fds = list(fds)
+
+        # Move listeners that occupy the target FD of another listener out of
+        # the way first, so none of them is clobbered by `dup2()` below.
+        for i, fd in enumerate(fds):
+            if 3 <= fd < 3 + count and fd != 3 + i:
+                fds[i] = fcntl.fcntl(fd, fcntl.F_DUPFD, 3 + count)
+                os.close(fd)
+
+        for index, fd in enumerate(fds, start=3):
+            if fd != index:
+                os.dup2(fd, index, inheritable=True)
+                os.close(fd)
+            self._exitstack.callback(os.close, index)
+
+        return tuple(range(3, 3 + count))
+
+    def _prepare_sockets(self):
+        # Prepare all the API sockets that osbuild-composer expectes, and make
+        # sure to pass them according to the systemd socket-activation API.
+        # If `COMPOSER_FD_SERVER=` is set, the sockets are received from the
+        # FD-server at that path, otherwise they are created here.
+
+        if self._exitstack is None:
+            self._exitstack = contextlib.ExitStack()
+
+        path = os.environ.get("COMPOSER_FD_SERVER")
+        if path:
+            print(f"Receive sockets from {path}", file=sys.stderr)
+            fds, names = self._receive_sockets(path)
+        else:
+            fds, names = self._create_sockets()
+
+        fds = self._renumber_fds(fds)
 
         # Prepare FD environment for the child process.
-        os.environ["LISTEN_FDS"] = str(len(sockets))
-        os.environ["LISTEN_FDNAMES"] = ":".join(names)
+        os.environ.update({
+            "LISTEN_FDS": str(len(fds)),
+            "LISTEN_FDNAMES": ":".join(names),
+        })
 
-        return sockets
+        return fds
 
     @staticmethod
     def _spawn_worker():
+        import subprocess
+
         cmd = [
             "/usr/libexec/osbuild-composer/osbuild-worker",
             "-unix",
             "/run/osbuild-composer/job.socket",
         ]
 
-        env = os.environ.copy()
-        env["CACHE_DIRECTORY"] = "/var/cache/osbuild-worker"
-        env["STATE_DIRECTORY"] = "/var/lib/osbuild-worker"
+        env = {
+            **os.environ,
+            "CACHE_DIRECTORY": "/var/cache/osbuild-worker",
+            "STATE_DIRECTORY": "/var/lib/osbuild-worker",
+        }
 
         return subprocess.Popen(
             cmd,
@@ -232,55 +341,112 @@ class Cli(contextlib.AbstractContextManager):
         )
 
     @staticmethod
-    def _spawn_composer(sockets):
+    def _spawn_composer(fds):
+        import subprocess
+
+        # We need to set `LISTEN_PID=` to the target PID, which is not known
+        # before the child is spawned. Rather than hooking into `preexec_fn=`
+        # (which forces `subprocess.Popen()` to run python code in the forked
+        # child), we let a shell set it to its own PID and then replace itself
+        # with osbuild-composer via `exec`, which retains the PID.
         cmd = [
+            "/bin/sh",
+            "-c",
+            'LISTEN_PID=$$ exec "$0" "$@"',
             "/usr/libexec/osbuild-composer/osbuild-composer",
             "-verbose",
         ]
 
-        # Prepare the environment for osbuild-composer. Note that we cannot use
-        # the `env` parameter of `subprocess.Popen()`, because it conflicts
-        # with the `preexec_fn=` parameter. Therefore, we have to modify the
-        # caller's environment.
-        os.environ["CACHE_DIRECTORY"] = "/var/cache/osbuild-composer"
-        os.environ["STATE_DIRECTORY"] = "/var/lib/osbuild-composer"
-
-        # We need to set `LISTEN_PID=` to the target PID. The only way python
-        # allows us to do this is to hook into `preexec_fn=`, which is executed
-        # by `subprocess.Popen()` after forking, but before executing the new
-        # executable.
-        preexec_setenv = lambda: os.putenv("LISTEN_PID", str(os.getpid()))
+        env = {
+            **os.environ,
+            "CACHE_DIRECTORY": "/var/cache/osbuild-composer",
+            "STATE_DIRECTORY": "/var/lib/osbuild-composer",
+        }
 
         return subprocess.Popen(
             cmd,
             cwd="/usr/libexec/osbuild-composer",
+            env=env,
             stdin=subprocess.DEVNULL,
             stderr=subprocess.STDOUT,
-            pass_fds=[sock.fileno() for sock in sockets],
-            preexec_fn=preexec_setenv,
+            pass_fds=fds,
+        )
+
+    @staticmethod
+    def _exec_composer(fds):
+        import signal
+
+        # Replace the entrypoint with osbuild-composer. This is used if it is
+        # the only process to run, in which case there is nothing left for us
+        # to manage. Since `exec` retains the PID, `LISTEN_PID=` is our own.
+        os.environ.update({
+            "CACHE_DIRECTORY": "/var/cache/osbuild-composer",
+            "STATE_DIRECTORY": "/var/lib/osbuild-composer",
+            "LISTEN_PID": str(os.getpid()),
+        })
+
+        # `subprocess.Popen()` closes all FDs but `pass_fds` in the child (with
+        # a single `close_range(2)` on python-3.10 and linux-5.9 onwards). Do
+        # the equivalent here, but only touch the FDs that are actually open
+        # rather than the entire FD range, as python-3.6 lacks `close_range`.
+        for name in os.listdir("/proc/self/fd"):
+            fd = int(name)
+            if fd > 2 and fd not in fds:
+                try:
+                    os.set_inheritable(fd, False)
+                except OSError:
+                    # The FD of the directory listing is gone already.
+                    pass
+
+        for fd in fds:
+            os.set_inheritable(fd, True)
+
+        # Mirror what `subprocess.Popen()` does for the spawned children:
+        # stdin from /dev/null and stderr redirected to stdout.
+        sys.stdout.flush()
+        sys.stderr.flush()
+        devnull = os.open(os.devnull, os.O_RDONLY)
+        if devnull != 0:
+            os.dup2(devnull, 0)
+            os.close(devnull)
+        else:
+            # stdin was closed, so /dev/null got FD-#0, but close-on-exec.
+            os.set_inheritable(0, True)
+        os.dup2(1, 2)
+
+        # Python ignores SIGPIPE and SIGXFSZ, and ignored signals stay ignored
+        # across `exec`. Restore their defaults, like `restore_signals=True`
+        # of `subprocess.Popen()` does.
+        signal.signal(signal.SIGPIPE, signal.SIG_DFL)
+        signal.signal(signal.SIGXFSZ, signal.SIG_DFL)
+
+        os.chdir("/usr/libexec/osbuild-composer")
+        os.execv(
+            "/usr/libexec/osbuild-composer/osbuild-composer",
+            [
+                "/usr/libexec/osbuild-composer/osbuild-composer",
+                "-verbose",
+            ],
         )
 
     def _spawn_dnf_json(self):
+        import subprocess
+
         cmd = [
             "/usr/libexec/osbuild-composer/dnf-json",
         ]
 
         if self.args.dnf_json_port:
-            sock = socket.socket(socket.AF_INET6, socket.SOCK_STREAM)
-            self._exitstack.enter_context(contextlib.closing(sock))
-            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-            sock.setsockopt(socket.IPPROTO_IPV6, socket.IPV6_V6ONLY, 0)
-            sock.bind(("::", self.args.dnf_json_port))
-            sock.listen()
+            sock = self._listen_inet6(self.args.dnf_json_port)
         else:
-            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
-            self._exitstack.enter_context(contextlib.closing(sock))
-            sock.bind("/run/osbuild-dnf-json/api.sock")
-            sock.listen()
+            sock = self._listen_unix("/run/osbuild-dnf-json/api.sock")
+        self._exitstack.enter_context(sock)
 
-        dnfenv = os.environ.copy()
-        dnfenv["LISTEN_FDS"] = "1"
-        dnfenv["LISTEN_FD"] = str(sock.fileno())
+        dnfenv = {
+            **os.environ,
+            "LISTEN_FDS": "1",
+            "LISTEN_FD": str(sock.fileno()),
+        }
 
         return subprocess.Popen(
             cmd,
@@ -298,7 +464,16 @@ class Cli(contextlib.AbstractContextManager):
         proc_worker = None
         proc_dnf_json = None
         res = 0
-        sockets = self._prepare_sockets()
+
+        fds = self._prepare_sockets()
+
+        # osbuild-composer is needed whenever there are API sockets to serve.
+        # These follow the `--[no-]*-api` toggles, unless they were received
+        # from an FD-server, in which case the server decides.
+        if fds and not (self.args.builtin_worker or self.args.dnf_json):
+            # osbuild-composer is the only process we would spawn, so rather
+            # than waiting for it, let it take over this process.
+            self._exec_composer(fds)
 
         try:
             if self.args.builtin_worker:
@@ -307,21 +482,31 @@ class Cli(contextlib.AbstractContextManager):
             if self.args.dnf_json:
                 proc_dnf_json = self._spawn_dnf_json()
 
-            if any([self.args.weldr_api, self.args.composer_api, self.args.local_worker_api, self.args.remote_worker_api]):
-                proc_composer = self._spawn_composer(sockets)
-
-            if proc_composer:
-                res = proc_composer.wait()
-
-            if proc_worker:
-                if proc_composer:
-                    proc_worker.terminate()
-                proc_worker.wait()
-
-            if proc_dnf_json:
-                if proc_composer:
-                    proc_dnf_json.terminate()
-                proc_dnf_json.wait()
+            if fds:
+                proc_composer = self._spawn_composer(fds)
+
+            # Wait for whichever child exits first. Thanks to `WNOWAIT` it is
+            # left for its `Popen` object to reap, so that one stays in sync.
+            # Once osbuild-composer exits, terminate the remaining children.
+            children = {
+                proc.pid: proc
+                for proc in (proc_worker, proc_dnf_json, proc_composer)
+                if proc
+            }
+            while children:
+                info = os.waitid(os.P_ALL, 0, os.WEXITED | os.WNOWAIT)
+                proc = children.pop(info.si_pid, None)
+                if proc is None:
+                    # Not one of ours, but an orphan re-parented to us (e.g.,
+                    # if we run as PID-1 of the container). Just reap it.
+                    os.waitpid(info.si_pid, 0)
+                    continue
+
+                status = proc.wait()
+                if proc is proc_composer:
+                    res = status
+                    for other in children.values():
+                        other.terminate()
 
             return res
         except KeyboardInterrupt: